@@ -1,18 +1,41 @@
 import os
-import json
+import re
+import asyncio
 import argparse
 import socket
 import sqlite3
+import threading
 import shutil
+import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor
+import zlib
+import multiprocessing
+import zipfile
+import posixpath
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 
 from docx import Document
-from openai import OpenAI
+from docx.oxml.parser import element_class_lookup
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from lxml import etree
+import httpx
+import orjson
+from openai import (
+    APIConnectionError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    InternalServerError,
+    RateLimitError,
+)
 
 # -----------------------------
 # Compatibility fix (Windows)
@@ -55,15 +78,29 @@ def export_dir(task_id: str) -> str:
 
 
 # ---------- db ----------
+_local = threading.local()
+
+# blocks a translate job still has to do: not edited by hand, no usable translation yet
+_PENDING_WHERE = "status != 'edited' AND (status != 'translated' OR COALESCE(translated_text, '') = '')"
+
+
 def db():
-    conn = sqlite3.connect(path_db(), check_same_thread=False)
-    conn.row_factory = sqlite3.Row
+    # one long-lived connection per thread; use `with conn:` for write transactions
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(path_db(), check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        # per-connection settings; WAL itself is persisted by init_db
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        _local.conn = conn
     return conn
 
 
 def init_db():
     conn = db()
     cur = conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
     cur.execute(
         """
     CREATE TABLE IF NOT EXISTS settings(
@@ -83,48 +120,135 @@ def init_db():
       direction TEXT NOT NULL,
       status TEXT NOT NULL,
       progress REAL NOT NULL,
-      error TEXT
+      error TEXT,
+      sources BLOB,
+      batch_id TEXT
     )"""
     )
+    # immutable per-block data (locator, kind, source_text) lives in tasks.sources,
+    # indexed by order_no; rows here only carry what changes during a task
     cur.execute(
         """
     CREATE TABLE IF NOT EXISTS blocks(
       id TEXT PRIMARY KEY,
       task_id TEXT NOT NULL,
-      locator TEXT NOT NULL,
-      kind TEXT NOT NULL,
       order_no INTEGER NOT NULL,
-      source_text TEXT NOT NULL,
       translated_text TEXT,
       status TEXT NOT NULL
     )"""
     )
+    _migrate_block_sources(conn)
+    task_cols = [r["name"] for r in conn.execute("PRAGMA table_info(tasks)")]
+    if "batch_id" not in task_cols:
+        cur.execute("ALTER TABLE tasks ADD COLUMN batch_id TEXT")
+    cur.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_blocks_task_order ON blocks(task_id, order_no)"
+    )
+    # partial index over the blocks a translate job still has to do; its WHERE must
+    # stay textually identical to the pending query's or SQLite won't use it
+    cur.execute("DROP INDEX IF EXISTS idx_blocks_task_status")
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_blocks_pending ON blocks(task_id, order_no) "
+        f"WHERE {_PENDING_WHERE}"
+    )
     conn.commit()
-    conn.close()
+
+
+def pack_sources(blocks: list) -> bytes:
+    # blocks must be in order_no order (0..n-1), as extract_blocks returns them
+    data = [[b["locator"], b["kind"], b["source_text"]] for b in blocks]
+    return zlib.compress(orjson.dumps(data))
+
+
+def unpack_sources(blob) -> list:
+    # -> [[locator, kind, source_text], ...] indexed by order_no
+    return orjson.loads(zlib.decompress(blob)) if blob else []
+
+
+def _migrate_block_sources(conn):
+    # databases created before tasks.sources kept locator/kind/source_text per row
+    task_cols = [r["name"] for r in conn.execute("PRAGMA table_info(tasks)")]
+    if "sources" not in task_cols:
+        conn.execute("ALTER TABLE tasks ADD COLUMN sources BLOB")
+    block_cols = [r["name"] for r in conn.execute("PRAGMA table_info(blocks)")]
+    if "source_text" not in block_cols:
+        return
+
+    conn.execute("BEGIN")
+    try:
+        for (task_id,) in conn.execute("SELECT DISTINCT task_id FROM blocks").fetchall():
+            # order_no was always assigned 0..n-1, so it stays a valid list index
+            rows = conn.execute(
+                "SELECT locator, kind, source_text FROM blocks WHERE task_id=? ORDER BY order_no",
+                (task_id,),
+            ).fetchall()
+            conn.execute(
+                "UPDATE tasks SET sources=? WHERE id=?", (pack_sources(rows), task_id)
+            )
+        conn.execute(
+            """
+        CREATE TABLE blocks_new(
+          id TEXT PRIMARY KEY,
+          task_id TEXT NOT NULL,
+          order_no INTEGER NOT NULL,
+          translated_text TEXT,
+          status TEXT NOT NULL
+        )"""
+        )
+        conn.execute(
+            "INSERT INTO blocks_new(id, task_id, order_no, translated_text, status) "
+            "SELECT id, task_id, order_no, translated_text, status FROM blocks"
+        )
+        conn.execute("DROP TABLE blocks")
+        conn.execute("ALTER TABLE blocks_new RENAME TO blocks")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+@dataclass(frozen=True)
+class Settings:
+    base_url: str
+    api_key: str
+    model: str
+
+
+# in-memory snapshot of the settings row: read by load_settings at startup,
+# replaced by upsert_settings; get_settings never touches the db, so it is safe
+# to call from the event loop
+_settings_cache = None
+_settings_lock = threading.Lock()
+
+
+def load_settings():
+    global _settings_cache
+    with _settings_lock:
+        row = db().execute("SELECT base_url, api_key, model FROM settings WHERE id=1").fetchone()
+        _settings_cache = Settings(**dict(row)) if row else None
 
 
 def get_settings():
-    conn = db()
-    row = conn.execute(
-        "SELECT base_url, api_key, model FROM settings WHERE id=1"
-    ).fetchone()
-    conn.close()
-    return dict(row) if row else None
+    return _settings_cache
 
 
 def upsert_settings(base_url: str, api_key: str, model: str):
-    conn = db()
-    conn.execute(
-        "INSERT INTO settings(id, base_url, api_key, model) VALUES(1,?,?,?) "
-        "ON CONFLICT(id) DO UPDATE SET base_url=excluded.base_url, api_key=excluded.api_key, model=excluded.model",
-        (base_url, api_key, model),
-    )
-    conn.commit()
-    conn.close()
+    global _settings_cache
+    with _settings_lock:
+        conn = db()
+        with conn:
+            conn.execute(
+                "INSERT INTO settings(id, base_url, api_key, model) VALUES(1,?,?,?) "
+                "ON CONFLICT(id) DO UPDATE SET base_url=excluded.base_url, api_key=excluded.api_key, model=excluded.model",
+                (base_url, api_key, model),
+            )
+        _settings_cache = Settings(base_url, api_key, model)
 
 
 # ---------- docx extract/apply ----------
 def extract_blocks(docx_path: str):
+    # Full-DOM reference for the locator scheme apply_translations relies on.
+    # The server uses extract_blocks_stream; tests keep the two in parity.
     doc = Document(docx_path)
     blocks = []
     order_no = 0
@@ -145,21 +269,93 @@ def extract_blocks(docx_path: str):
 
     # tables
     for ti, table in enumerate(doc.tables):
-        for ri, row in enumerate(table.rows):
-            for ci, cell in enumerate(row.cells):
-                for pi, p in enumerate(cell.paragraphs):
-                    text = (p.text or "").strip()
-                    if text:
-                        blocks.append(
-                            {
-                                "locator": f"t:{ti}/r:{ri}/c:{ci}/p:{pi}",
-                                "kind": "table_cell_paragraph",
-                                "source_text": text,
-                                "order_no": order_no,
-                            }
-                        )
-                        order_no += 1
+        order_no = _append_table_blocks(blocks, ti, table, order_no)
+
+    return blocks
+
+
+def _append_table_blocks(blocks: list, ti: int, table, order_no: int) -> int:
+    for ri, row in enumerate(table.rows):
+        for ci, cell in enumerate(row.cells):
+            for pi, p in enumerate(cell.paragraphs):
+                text = (p.text or "").strip()
+                if text:
+                    blocks.append(
+                        {
+                            "locator": f"t:{ti}/r:{ri}/c:{ci}/p:{pi}",
+                            "kind": "table_cell_paragraph",
+                            "source_text": text,
+                            "order_no": order_no,
+                        }
+                    )
+                    order_no += 1
+    return order_no
+
+
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_W_BODY = f"{{{_W_NS}}}body"
+_W_P = f"{{{_W_NS}}}p"
+_W_TBL = f"{{{_W_NS}}}tbl"
+_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_OFFICE_DOCUMENT_REL = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+
+
+def _main_part_name(z: zipfile.ZipFile) -> str:
+    rels = etree.fromstring(z.read("_rels/.rels"))
+    for rel in rels.iter(f"{{{_REL_NS}}}Relationship"):
+        if rel.get("Type") == _OFFICE_DOCUMENT_REL:
+            return posixpath.normpath(rel.get("Target").lstrip("/"))
+    return "word/document.xml"
+
+
+def extract_blocks_stream(docx_path: str):
+    # Same blocks/locators as extract_blocks, but streams the main part and only
+    # keeps one top-level paragraph or table in memory at a time.
+    parser = etree.XMLPullParser(events=("end",), tag=(_W_P, _W_TBL))
+    # python-docx element classes, so paragraph text and merged cells match Document()
+    parser.set_element_class_lookup(element_class_lookup)
 
+    paragraphs = []
+    table_blocks = []
+    pi = 0
+    ti = 0
+
+    def handle(el):
+        nonlocal pi, ti
+        if el.getparent().tag != _W_BODY:
+            # nested in a table cell; read together with its table
+            return
+        if el.tag == _W_P:
+            text = (Paragraph(el, None).text or "").strip()
+            if text:
+                paragraphs.append((pi, text))
+            pi += 1
+        else:
+            _append_table_blocks(table_blocks, ti, Table(el, None), len(table_blocks))
+            ti += 1
+        el.clear()
+        while el.getprevious() is not None:
+            del el.getparent()[0]
+
+    with zipfile.ZipFile(docx_path) as z, z.open(_main_part_name(z)) as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            parser.feed(chunk)
+            for _, el in parser.read_events():
+                handle(el)
+        parser.close()
+        for _, el in parser.read_events():
+            handle(el)
+
+    # body paragraphs first, then tables (extract_blocks order)
+    blocks = [
+        {"locator": f"p:{i}", "kind": "paragraph", "source_text": text, "order_no": n}
+        for n, (i, text) in enumerate(paragraphs)
+    ]
+    for b in table_blocks:
+        b["order_no"] += len(blocks)
+    blocks.extend(table_blocks)
     return blocks
 
 
@@ -175,37 +371,182 @@ def _set_paragraph_text_keep_style(paragraph, new_text: str):
 
 def apply_translations(src_docx: str, out_docx: str, locator_to_text: dict):
     doc = Document(src_docx)
-
-    for i, p in enumerate(doc.paragraphs):
-        loc = f"p:{i}"
-        if loc in locator_to_text:
-            _set_paragraph_text_keep_style(p, locator_to_text[loc])
-
-    for ti, table in enumerate(doc.tables):
-        for ri, row in enumerate(table.rows):
-            for ci, cell in enumerate(row.cells):
-                for pi, p in enumerate(cell.paragraphs):
-                    loc = f"t:{ti}/r:{ri}/c:{ci}/p:{pi}"
-                    if loc in locator_to_text:
-                        _set_paragraph_text_keep_style(p, locator_to_text[loc])
+    # python-docx rebuilds these lists on every access
+    paras = doc.paragraphs
+    tbls = doc.tables
+    row_cells = {}
+
+    # walk only the translated locators instead of the whole document
+    for loc, text in locator_to_text.items():
+        idx = [int(part.split(":", 1)[1]) for part in loc.split("/")]
+        try:
+            if len(idx) == 1:
+                p = paras[idx[0]]
+            else:
+                ti, ri, ci, pi = idx
+                cells = row_cells.get((ti, ri))
+                if cells is None:
+                    cells = row_cells[(ti, ri)] = tbls[ti].rows[ri].cells
+                p = cells[ci].paragraphs[pi]
+        except IndexError:
+            # locator no longer present in the document
+            continue
+        _set_paragraph_text_keep_style(p, text)
 
     doc.save(out_docx)
 
 
-def build_messages(text: str, direction: str):
-    target = "English" if direction == "zh->en" else "Chinese"
-    system = (
+_TARGET = {"zh->en": "English", "en->zh": "Chinese"}
+
+# built once and shared by every request; the client only reads them
+_SYS = {
+    "role": "system",
+    "content": (
         "You are a professional translator. Output only the translation. "
         "Do not add explanations or any extra text. "
         "Preserve numbers, units, symbols, and formatting as much as possible."
-    )
-    user = f"Translate the following text into {target}:\n\n{text}"
-    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+    ),
+}
+_BATCH_SYS = {
+    direction: {
+        "role": "system",
+        "content": (
+            "You are a professional translator. "
+            "The input is a numbered list of items, each starting with a marker like <<1>>. "
+            f"Translate every item into {target} and return exactly one translation per item, "
+            "starting with the same marker. Do not merge, split, skip or reorder items. "
+            "Output only the translations. Do not add explanations or any extra text. "
+            "Preserve numbers, units, symbols, and formatting as much as possible."
+        ),
+    }
+    for direction, target in _TARGET.items()
+}
+
+
+def build_messages(text: str, direction: str):
+    user = f"Translate the following text into {_TARGET[direction]}:\n\n{text}"
+    return [_SYS, {"role": "user", "content": user}]
+
+
+# blocks sent per chat completion request
+BATCH_SIZE = 20
+# chat completion requests in flight across all tasks
+MAX_IN_FLIGHT = 12
+# queue consumers per translate task
+TASK_WORKERS = 8
+# translated blocks buffered before they are written and committed
+FLUSH_EVERY = 40
+# ...or seconds since the last write, so progress stays fresh for the UI poll
+FLUSH_INTERVAL = 1.0
+# seconds between status checks of an OpenAI batch job (mode=batch)
+BATCH_POLL_INTERVAL = 30.0
+# consecutive failed status checks tolerated before the job is reported as an error
+BATCH_POLL_RETRIES = 10
+
+# worth asking again later; anything else (bad key, bad request) is not
+_TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+_BATCH_MARKER_RE = re.compile(r"^<<(\d+)>>[ \t]?", re.MULTILINE)
+
+
+def has_batch_marker(text: str) -> bool:
+    # such a text would add a bogus item to a numbered batch; send it on its own
+    return _BATCH_MARKER_RE.search(text) is not None
+
+
+def build_batch_messages(texts: list[str], direction: str):
+    if any(has_batch_marker(t) for t in texts):
+        raise ValueError("text contains a line starting with a <<n>> marker")
+    user = "\n".join(f"<<{i}>> {t}" for i, t in enumerate(texts, 1))
+    return [_BATCH_SYS[direction], {"role": "user", "content": user}]
+
+
+def parse_batch_response(content: str, n: int):
+    # returns None when the reply does not map 1:1 onto the n inputs
+    parts = _BATCH_MARKER_RE.split(content or "")
+    nums = [int(num) for num in parts[1::2]]
+    # exactly one marker per input: duplicates, gaps and extras all count as a mismatch
+    if sorted(nums) != list(range(1, n + 1)):
+        return None
+    out = {num: text.strip() for num, text in zip(nums, parts[2::2])}
+    return [out[i] for i in range(1, n + 1)]
+
+
+# one client (and so one pooled connection set) per endpoint + key, shared by the
+# jobs using it; only used from the server loop
+_client_cache: dict[tuple, AsyncOpenAI] = {}
+_client_users: dict[tuple, int] = {}
+
+
+@asynccontextmanager
+async def _shared_client(base_url: str, api_key: str):
+    key = (base_url, api_key)
+    c = _client_cache.get(key)
+    if c is None:
+        c = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+            ),
+        )
+        _client_cache[key] = c
+    _client_users[key] = _client_users.get(key, 0) + 1
+    try:
+        yield c
+    finally:
+        _client_users[key] -= 1
+        await _evict_clients()
+
+
+async def _evict_clients(keep_current: bool = True):
+    # close clients for an endpoint/key no longer in settings once no job uses them
+    s = get_settings() if keep_current else None
+    current = (s.base_url, s.api_key) if s else None
+    for key in [k for k in _client_cache if k != current and not _client_users.get(k)]:
+        _client_users.pop(key, None)
+        c = _client_cache.pop(key, None)
+        if c is not None:
+            await c.close()
 
 
 # ---------- app ----------
-init_db()
-app = FastAPI(title="MVP Backend")
+# DOCX parse/apply is GIL-bound; run it in worker processes so the API stays
+# responsive. spawn matches the Windows build on every platform. Workers re-import
+# this module, so nothing here may touch the db or start the pool at import time.
+_proc_pool = None
+
+
+async def _run_in_pool(fn, *args):
+    global _proc_pool
+    if _proc_pool is None:
+        _proc_pool = ProcessPoolExecutor(
+            max_workers=2, mp_context=multiprocessing.get_context("spawn")
+        )
+    pool = _proc_pool
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # a worker died (crash, OOM, killed); start a fresh pool for the next request
+        if _proc_pool is pool:
+            _proc_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise HTTPException(500, "document worker crashed, please retry")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(init_db)
+    await asyncio.to_thread(load_settings)
+    for task_id in await asyncio.to_thread(_interrupted_tasks_sync):
+        _start_job(task_id, _translate_task_batch_api)
+    yield
+    await _evict_clients(keep_current=False)
+    if _proc_pool is not None:
+        _proc_pool.shutdown(cancel_futures=True)
+
+
+app = FastAPI(title="MVP Backend", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -214,7 +555,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-executor = ThreadPoolExecutor(max_workers=2)
+# translate jobs run on the server loop; keep references so they are not collected
+_running: dict[str, asyncio.Task] = {}
+_api_slots = asyncio.Semaphore(MAX_IN_FLIGHT)
 
 
 @app.get("/api/health")
@@ -223,31 +566,33 @@ def health():
 
 
 @app.get("/api/settings")
-def api_get_settings():
+async def api_get_settings():
     s = get_settings()
-    return s or {"base_url": "", "api_key": "", "model": ""}
+    return asdict(s) if s else {"base_url": "", "api_key": "", "model": ""}
 
 
 @app.post("/api/settings")
-def api_save_settings(payload: dict):
+async def api_save_settings(payload: dict):
     base_url = normalize_base_url(payload.get("base_url") or "")
     api_key = (payload.get("api_key") or "").strip()
     model = (payload.get("model") or "").strip()
     if not base_url or not api_key or not model:
         raise HTTPException(400, "base_url/api_key/model required")
-    upsert_settings(base_url, api_key, model)
+    await asyncio.to_thread(upsert_settings, base_url, api_key, model)
+    await _evict_clients()
     return {"ok": True, "base_url": base_url, "model": model}
 
 
 @app.post("/api/models")
-def api_list_models(payload: dict):
+async def api_list_models(payload: dict):
     base_url = normalize_base_url(payload.get("base_url") or "")
     api_key = (payload.get("api_key") or "").strip()
     if not base_url or not api_key:
         raise HTTPException(400, "base_url and api_key required")
 
-    client = OpenAI(api_key=api_key, base_url=base_url)
-    r = client.models.list()
+    # the endpoint/key here are only being tried out; don't cache a client for them
+    async with AsyncOpenAI(api_key=api_key, base_url=base_url) as client:
+        r = await client.models.list()
 
     ids = [m.id for m in (r.data or [])]
 
@@ -264,6 +609,34 @@ def api_list_models(payload: dict):
     return {"base_url": base_url, "models": ids_sorted}
 
 
+def _link_or_copy(src: str, dst: str):
+    # work.docx is never modified in place (exports go to a new file), so a
+    # hardlink to the upload is enough; copy where links are unsupported
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _create_task_sync(
+    task_id: str, filename: str, src_path: str, work_path: str, direction: str, blocks: list
+):
+    sources = pack_sources(blocks)
+    conn = db()
+    with conn:
+        conn.execute(
+            "INSERT INTO tasks(id, filename, source_path, work_path, direction, status, progress, error, sources) "
+            "VALUES(?,?,?,?,?,?,?,?,?)",
+            (task_id, filename, src_path, work_path, direction, "created", 0.0, None, sources),
+        )
+
+        conn.executemany(
+            "INSERT INTO blocks(id, task_id, order_no, translated_text, status) "
+            "VALUES(?,?,?,?,?)",
+            [(f"blk_{uuid.uuid4().hex}", task_id, b["order_no"], None, "pending") for b in blocks],
+        )
+
+
 @app.post("/api/tasks")
 async def create_task(file: UploadFile = File(...), direction: str = Form(...)):
     if direction not in ("zh->en", "en->zh"):
@@ -272,184 +645,444 @@ async def create_task(file: UploadFile = File(...), direction: str = Form(...)):
         raise HTTPException(400, "only .docx supported in MVP")
 
     s = get_settings()
-    if not s or not s["base_url"] or not s["api_key"] or not s["model"]:
+    if not s or not s.base_url or not s.api_key or not s.model:
         raise HTTPException(400, "please set settings first")
 
     task_id = f"task_{uuid.uuid4().hex}"
     wd = work_dir(task_id)
     src_path = os.path.join(wd, file.filename)
 
+    # copy in 1 MiB chunks so memory stays flat regardless of upload size
     with open(src_path, "wb") as f:
-        f.write(await file.read())
+        while chunk := await file.read(1 << 20):
+            await asyncio.to_thread(f.write, chunk)
 
     work_path = os.path.join(wd, "work.docx")
-    shutil.copy2(src_path, work_path)
+    await asyncio.to_thread(_link_or_copy, src_path, work_path)
 
-    blocks = extract_blocks(work_path)
+    blocks = await _run_in_pool(extract_blocks_stream, work_path)
 
-    conn = db()
-    conn.execute(
-        "INSERT INTO tasks(id, filename, source_path, work_path, direction, status, progress, error) "
-        "VALUES(?,?,?,?,?,?,?,?)",
-        (task_id, file.filename, src_path, work_path, direction, "created", 0.0, None),
+    await asyncio.to_thread(
+        _create_task_sync, task_id, file.filename, src_path, work_path, direction, blocks
     )
-
-    for b in blocks:
-        conn.execute(
-            "INSERT INTO blocks(id, task_id, locator, kind, order_no, source_text, translated_text, status) "
-            "VALUES(?,?,?,?,?,?,?,?)",
-            (
-                f"blk_{uuid.uuid4().hex}",
-                task_id,
-                b["locator"],
-                b["kind"],
-                b["order_no"],
-                b["source_text"],
-                None,
-                "pending",
-            ),
-        )
-    conn.commit()
-    conn.close()
-
     return {"task_id": task_id, "blocks": len(blocks)}
 
 
-@app.get("/api/tasks/{task_id}")
-def get_task(task_id: str):
+def _get_task_sync(task_id: str):
     conn = db()
-    row = conn.execute(
+    return conn.execute(
         "SELECT id, status, progress, error, direction FROM tasks WHERE id=?",
         (task_id,),
     ).fetchone()
-    conn.close()
+
+
+@app.get("/api/tasks/{task_id}")
+async def get_task(task_id: str):
+    row = await asyncio.to_thread(_get_task_sync, task_id)
     if not row:
         raise HTTPException(404, "task not found")
     return dict(row)
 
 
-def _translate_task(task_id: str):
+async def _translate_one(client, model: str, text: str, direction: str) -> str:
+    async with _api_slots:
+        r = await client.chat.completions.create(
+            model=model, messages=build_messages(text, direction), temperature=0.2
+        )
+    return (r.choices[0].message.content or "").strip()
+
+
+async def _translate_batch(client, model: str, texts: list[str], direction: str) -> list[str]:
+    outs = [None] * len(texts)
+    # texts with a marker line (and a lone leftover) go one request each; every
+    # request takes its own _api_slots slot, so they all run concurrently
+    alone = [i for i, t in enumerate(texts) if has_batch_marker(t)]
+    batch = [i for i, t in enumerate(texts) if not has_batch_marker(t)]
+    if len(batch) == 1:
+        alone, batch = alone + batch, []
+
+    async def one(i):
+        outs[i] = await _translate_one(client, model, texts[i], direction)
+
+    async def numbered():
+        batch_texts = [texts[i] for i in batch]
+        async with _api_slots:
+            r = await client.chat.completions.create(
+                model=model, messages=build_batch_messages(batch_texts, direction), temperature=0.2
+            )
+        batch_outs = parse_batch_response(r.choices[0].message.content, len(batch))
+        if batch_outs is None:
+            # model did not keep the numbering; fall back to one request per block
+            await asyncio.gather(*(one(i) for i in batch))
+        else:
+            for i, out in zip(batch, batch_outs):
+                outs[i] = out
+
+    await asyncio.gather(*(one(i) for i in alone), *([numbered()] if batch else []))
+    return outs
+
+
+def _pending_blocks_sync(task_id: str, sources: list):
+    # -> [(block id, source_text) still to translate]
+    # skip edited blocks and blocks that already have a translation;
+    # shares its WHERE with idx_blocks_pending so the scan stays on that index
+    rows = db().execute(
+        f"SELECT id, order_no FROM blocks WHERE task_id=? AND {_PENDING_WHERE} "
+        "ORDER BY order_no ASC",
+        (task_id,),
+    ).fetchall()
+    return [(r["id"], sources[r["order_no"]][2]) for r in rows]
+
+
+def _begin_translate_sync(task_id: str):
+    # -> (task, total block count, [(block id, source_text) still to translate])
     conn = db()
-    try:
-        task = conn.execute("SELECT * FROM tasks WHERE id=?", (task_id,)).fetchone()
-        if not task:
-            return
+    task = conn.execute(
+        "SELECT direction, sources, batch_id FROM tasks WHERE id=?", (task_id,)
+    ).fetchone()
+    if not task:
+        return None, 0, []
 
+    with conn:
         conn.execute("UPDATE tasks SET status=?, error=? WHERE id=?", ("running", None, task_id))
-        conn.commit()
 
-        s = get_settings()
-        client = OpenAI(api_key=s["api_key"], base_url=s["base_url"])
-        model = s["model"]
+    total = conn.execute("SELECT COUNT(*) FROM blocks WHERE task_id=?", (task_id,)).fetchone()[0]
+    pending = _pending_blocks_sync(task_id, unpack_sources(task["sources"]))
+    return task, total, pending
 
-        blocks = conn.execute(
-            "SELECT * FROM blocks WHERE task_id=? ORDER BY order_no ASC", (task_id,)
-        ).fetchall()
 
-        total = len(blocks)
-        done = 0
+def _save_translations_sync(task_id: str, rows: list, progress: float):
+    conn = db()
+    with conn:
+        conn.executemany("UPDATE blocks SET translated_text=?, status=? WHERE id=?", rows)
+        conn.execute("UPDATE tasks SET progress=? WHERE id=?", (progress, task_id))
 
-        for b in blocks:
-            if b["status"] == "edited":
-                done += 1
-            elif b["translated_text"] and b["status"] == "translated":
-                done += 1
-            else:
-                msgs = build_messages(b["source_text"], task["direction"])
-                r = client.chat.completions.create(
-                    model=model, messages=msgs, temperature=0.2
-                )
-                out = (r.choices[0].message.content or "").strip()
-                conn.execute(
-                    "UPDATE blocks SET translated_text=?, status=? WHERE id=?",
-                    (out, "translated", b["id"]),
-                )
-                done += 1
 
-            progress = 1.0 if total == 0 else done / total
-            conn.execute("UPDATE tasks SET progress=? WHERE id=?", (progress, task_id))
-            conn.commit()
+def _set_batch_id_sync(task_id: str, batch_id):
+    conn = db()
+    with conn:
+        conn.execute("UPDATE tasks SET batch_id=? WHERE id=?", (batch_id, task_id))
+
+
+def _get_batch_id_sync(task_id: str):
+    row = db().execute("SELECT batch_id FROM tasks WHERE id=?", (task_id,)).fetchone()
+    return row["batch_id"] if row else None
+
 
+def _interrupted_tasks_sync():
+    # a restart killed whatever was running: batch jobs live on remotely and are
+    # resumed, chat jobs are marked failed so they can simply be run again
+    conn = db()
+    with conn:
         conn.execute(
-            "UPDATE tasks SET status=?, progress=? WHERE id=?", ("finished", 1.0, task_id)
+            "UPDATE tasks SET status=?, error=? WHERE status=? AND batch_id IS NULL",
+            ("error", "interrupted by a restart", "running"),
         )
-        conn.commit()
+    return [r["id"] for r in conn.execute("SELECT id FROM tasks WHERE batch_id IS NOT NULL")]
+
+
+def _end_translate_sync(task_id: str, error=None):
+    conn = db()
+    with conn:
+        if error is None:
+            conn.execute(
+                "UPDATE tasks SET status=?, progress=? WHERE id=?", ("finished", 1.0, task_id)
+            )
+        else:
+            conn.execute("UPDATE tasks SET status=?, error=? WHERE id=?", ("error", error, task_id))
+
+
+def _group_pending(pending):
+    # -> {source_text: [block ids]}; each distinct source text is translated
+    # once, then fanned out to its blocks
+    unique = {}
+    for bid, src in pending:
+        unique.setdefault(src, []).append(bid)
+    return unique
+
+
+async def _translate_task_async(task_id: str):
+    try:
+        task, total, pending = await asyncio.to_thread(_begin_translate_sync, task_id)
+        if not task:
+            return
+
+        s = get_settings()
+        model = s.model
+
+        done = total - len(pending)
+        unique = _group_pending(pending)
+        buf = []
+        last_flush = time.monotonic()
+        write_lock = asyncio.Lock()
+
+        q = asyncio.Queue()
+        it = iter(unique.items())
+        for chunk in iter(lambda: list(islice(it, BATCH_SIZE)), []):
+            q.put_nowait(chunk)
+
+        async def flush():
+            nonlocal last_flush
+            last_flush = time.monotonic()
+            # the lock keeps commits (and so the stored progress) in order; take the
+            # rows only once it is held, so a flush cancelled while waiting drops nothing
+            async with write_lock:
+                rows = buf[:]
+                buf.clear()
+                await asyncio.to_thread(_save_translations_sync, task_id, rows, done / total)
+
+        async def worker(client):
+            nonlocal done
+            while not q.empty():
+                chunk = q.get_nowait()
+                outs = await _translate_batch(
+                    client, model, [src for src, _ in chunk], task["direction"]
+                )
+                for out, (_, ids) in zip(outs, chunk):
+                    buf.extend((out, "translated", bid) for bid in ids)
+                    done += len(ids)
+                if len(buf) >= FLUSH_EVERY or time.monotonic() - last_flush > FLUSH_INTERVAL:
+                    await flush()
+
+        async with _shared_client(s.base_url, s.api_key) as client:
+            n = min(TASK_WORKERS, q.qsize())
+            workers = [asyncio.create_task(worker(client)) for _ in range(n)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for w in workers:
+                    w.cancel()
+                # let cancelled workers unwind (and finish any write in progress)
+                # before the last flush, then keep whatever was translated before a failure
+                await asyncio.gather(*workers, return_exceptions=True)
+                if buf:
+                    await flush()
+
+        await asyncio.to_thread(_end_translate_sync, task_id)
 
     except Exception as e:
-        conn.execute("UPDATE tasks SET status=?, error=? WHERE id=?", ("error", str(e), task_id))
-        conn.commit()
-    finally:
-        conn.close()
+        await asyncio.to_thread(_end_translate_sync, task_id, str(e))
+
+
+async def _poll_batch(client, batch_id: str, task_id: str, done: int, total: int):
+    # -> the batch once it reaches a final status; transient errors are retried
+    # on the next tick rather than failing a job that may still be running remotely
+    failures = 0
+    while True:
+        try:
+            job = await client.batches.retrieve(batch_id)
+        except _TRANSIENT_ERRORS:
+            failures += 1
+            if failures >= BATCH_POLL_RETRIES:
+                raise
+        else:
+            failures = 0
+            if job.status in ("completed", "failed", "expired", "cancelled"):
+                return job
+            counts = job.request_counts
+            if counts and counts.total:
+                progress = (done + (total - done) * counts.completed / counts.total) / total
+                await asyncio.to_thread(_save_translations_sync, task_id, [], progress)
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+
+
+async def _translate_task_batch_api(task_id: str):
+    # Same job through the OpenAI Batch API: cheaper and not limited by our own
+    # concurrency, but results arrive minutes (up to 24h) later. The batch id is
+    # stored on the task so a restart resumes polling instead of submitting again.
+    try:
+        task, total, pending = await asyncio.to_thread(_begin_translate_sync, task_id)
+        if not task:
+            return
+
+        s = get_settings()
+        sources = unpack_sources(task["sources"])
+        batch_id = task["batch_id"]
+        if not pending and not batch_id:
+            await asyncio.to_thread(_end_translate_sync, task_id)
+            return
+
+        async with _shared_client(s.base_url, s.api_key) as client:
+            if not batch_id:
+                # custom_id is the order_no of the first block with that source text;
+                # sources never change, so it still resolves after a restart
+                first = {}
+                for order_no, (_, _, src) in enumerate(sources):
+                    first.setdefault(src, order_no)
+                lines = [
+                    {
+                        "custom_id": str(first[src]),
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": {
+                            "model": s.model,
+                            "messages": build_messages(src, task["direction"]),
+                            "temperature": 0.2,
+                        },
+                    }
+                    for src in _group_pending(pending)
+                ]
+                data = b"\n".join(orjson.dumps(line) for line in lines)
+                f = await client.files.create(file=("batch.jsonl", data), purpose="batch")
+                job = await client.batches.create(
+                    input_file_id=f.id, endpoint="/v1/chat/completions", completion_window="24h"
+                )
+                batch_id = job.id
+                await asyncio.to_thread(_set_batch_id_sync, task_id, batch_id)
+
+            job = await _poll_batch(client, batch_id, task_id, total - len(pending), total)
+
+            outs = {}
+            if job.status == "completed" and job.output_file_id:
+                content = await client.files.content(job.output_file_id)
+                for line in content.text.splitlines():
+                    if not line.strip():
+                        continue
+                    r = orjson.loads(line)
+                    resp = r.get("response") or {}
+                    if resp.get("status_code") != 200:
+                        continue
+                    out = (resp["body"]["choices"][0]["message"]["content"] or "").strip()
+                    outs[sources[int(r["custom_id"])][2]] = out
+
+        # blocks may have been edited while the batch ran; only fill what is still pending
+        pending = await asyncio.to_thread(_pending_blocks_sync, task_id, sources)
+        rows = [(outs[src], "translated", bid) for bid, src in pending if src in outs]
+        missing = len(pending) - len(rows)
+        await asyncio.to_thread(_save_translations_sync, task_id, rows, (total - missing) / total)
+        await asyncio.to_thread(_set_batch_id_sync, task_id, None)
+
+        if job.status != "completed":
+            raise RuntimeError(f"batch {job.id} {job.status}")
+        if missing:
+            # left pending; a normal run picks them up
+            raise RuntimeError(f"{missing} blocks missing from batch {job.id} output")
+
+        await asyncio.to_thread(_end_translate_sync, task_id)
+
+    except Exception as e:
+        if not isinstance(e, _TRANSIENT_ERRORS):
+            # batch gone, endpoint/key changed, output unreadable: resuming would
+            # fail the same way forever, so forget the batch and let a new run start over
+            await asyncio.to_thread(_set_batch_id_sync, task_id, None)
+        await asyncio.to_thread(_end_translate_sync, task_id, str(e))
+
+
+def _start_job(task_id: str, job):
+    t = asyncio.create_task(job(task_id))
+    _running[task_id] = t
+    t.add_done_callback(lambda _: _running.pop(task_id, None))
 
 
 @app.post("/api/tasks/{task_id}/run_translate")
-def run_translate(task_id: str):
-    conn = db()
-    row = conn.execute("SELECT status FROM tasks WHERE id=?", (task_id,)).fetchone()
-    conn.close()
+async def run_translate(task_id: str, mode: str = "chat"):
+    if mode not in ("chat", "batch"):
+        raise HTTPException(400, "mode must be chat or batch")
+
+    row = await asyncio.to_thread(_get_task_sync, task_id)
     if not row:
         raise HTTPException(404, "task not found")
-    if row["status"] == "running":
+    batch_id = await asyncio.to_thread(_get_batch_id_sync, task_id)
+
+    # no await from here to _start_job, or a concurrent request could start a
+    # second job. _running, not tasks.status: a status left at "running" by a
+    # crash must not lock the task forever
+    if task_id in _running:
         return {"ok": True, "status": "running"}
-    executor.submit(_translate_task, task_id)
+
+    # a submitted batch is resumed rather than paid for twice
+    if batch_id:
+        mode = "batch"
+    _start_job(task_id, _translate_task_batch_api if mode == "batch" else _translate_task_async)
     return {"ok": True}
 
 
-@app.get("/api/tasks/{task_id}/blocks")
-def list_blocks(task_id: str, offset: int = 0, limit: int = 2000):
+def _list_blocks_sync(task_id: str, offset: int, limit: int):
     conn = db()
+    task = conn.execute("SELECT sources FROM tasks WHERE id=?", (task_id,)).fetchone()
+    if not task:
+        return []
+
+    sources = unpack_sources(task["sources"])
     rows = conn.execute(
-        "SELECT id, order_no, status, locator, kind, source_text, translated_text "
+        "SELECT id, order_no, status, translated_text "
         "FROM blocks WHERE task_id=? ORDER BY order_no ASC LIMIT ? OFFSET ?",
         (task_id, limit, offset),
     ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+    out = []
+    for r in rows:
+        locator, kind, source_text = sources[r["order_no"]]
+        out.append(
+            {
+                "id": r["id"],
+                "order_no": r["order_no"],
+                "status": r["status"],
+                "locator": locator,
+                "kind": kind,
+                "source_text": source_text,
+                "translated_text": r["translated_text"],
+            }
+        )
+    return out
 
 
-@app.patch("/api/tasks/{task_id}/blocks/{block_id}")
-def patch_block(task_id: str, block_id: str, payload: dict):
-    translated_text = payload.get("translated_text")
-    if translated_text is None:
-        raise HTTPException(400, "translated_text required")
+@app.get("/api/tasks/{task_id}/blocks")
+async def list_blocks(task_id: str, offset: int = 0, limit: int = 2000):
+    return await asyncio.to_thread(_list_blocks_sync, task_id, offset, limit)
+
 
+def _patch_block_sync(task_id: str, block_id: str, translated_text: str):
     conn = db()
     row = conn.execute(
         "SELECT id FROM blocks WHERE id=? AND task_id=?", (block_id, task_id)
     ).fetchone()
     if not row:
-        conn.close()
         raise HTTPException(404, "block not found")
 
-    conn.execute(
-        "UPDATE blocks SET translated_text=?, status=? WHERE id=?",
-        (translated_text, "edited", block_id),
-    )
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute(
+            "UPDATE blocks SET translated_text=?, status=? WHERE id=?",
+            (translated_text, "edited", block_id),
+        )
+
+
+@app.patch("/api/tasks/{task_id}/blocks/{block_id}")
+async def patch_block(task_id: str, block_id: str, payload: dict):
+    translated_text = payload.get("translated_text")
+    if translated_text is None:
+        raise HTTPException(400, "translated_text required")
+
+    await asyncio.to_thread(_patch_block_sync, task_id, block_id, translated_text)
     return {"ok": True}
 
 
-@app.get("/api/tasks/{task_id}/export")
-def export_docx(task_id: str):
+def _export_docx_sync(task_id: str):
     conn = db()
     task = conn.execute(
-        "SELECT work_path, filename FROM tasks WHERE id=?", (task_id,)
+        "SELECT work_path, filename, sources FROM tasks WHERE id=?", (task_id,)
     ).fetchone()
     if not task:
-        conn.close()
         raise HTTPException(404, "task not found")
 
+    sources = unpack_sources(task["sources"])
     blocks = conn.execute(
-        "SELECT locator, translated_text FROM blocks WHERE task_id=?", (task_id,)
+        "SELECT order_no, translated_text FROM blocks WHERE task_id=? ORDER BY order_no ASC",
+        (task_id,),
     ).fetchall()
-    conn.close()
 
-    locator_to_text = {b["locator"]: b["translated_text"] for b in blocks if b["translated_text"]}
+    locator_to_text = {
+        sources[b["order_no"]][0]: b["translated_text"] for b in blocks if b["translated_text"]
+    }
 
     out_path = os.path.join(export_dir(task_id), f"translated_{task['filename']}")
-    apply_translations(task["work_path"], out_path, locator_to_text)
+    return task["work_path"], out_path, locator_to_text
+
+
+@app.get("/api/tasks/{task_id}/export")
+async def export_docx(task_id: str):
+    work_path, out_path, locator_to_text = await asyncio.to_thread(_export_docx_sync, task_id)
 
+    await _run_in_pool(apply_translations, work_path, out_path, locator_to_text)
     return FileResponse(
         out_path,
         media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
@@ -460,8 +1093,8 @@ def export_docx(task_id: str):
 def _atomic_write_json(path: str, data: dict):
     os.makedirs(os.path.dirname(path), exist_ok=True)
     tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f)
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(data))
         f.flush()
         os.fsync(f.fileno())
     os.replace(tmp, path)
@@ -493,4 +1126,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # needed for the process pool in the PyInstaller build
+    multiprocessing.freeze_support()
     main()
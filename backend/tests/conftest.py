@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# backend_server is a script, not a package; import it from the backend dir and
+# keep its data (app.db, work/, exports/) out of the working tree
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MVP_DATA_DIR", tempfile.mkdtemp(prefix="mvp_test_"))
@@ -0,0 +1,79 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import backend_server as bs
+from test_pending_blocks import _make_task
+
+
+class _FakeBatches:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    async def retrieve(self, batch_id):
+        self.calls += 1
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(id=batch_id, status=reply, request_counts=None)
+
+
+def _conn_error():
+    return openai.APIConnectionError(request=httpx.Request("GET", "http://x/v1/batches/b"))
+
+
+def _poll(monkeypatch, replies):
+    monkeypatch.setattr(bs, "BATCH_POLL_INTERVAL", 0)
+    client = SimpleNamespace(batches=_FakeBatches(replies))
+    job = asyncio.run(bs._poll_batch(client, "b", "t", 0, 1))
+    return job, client.batches.calls
+
+
+def test_poll_batch_retries_transient_errors(monkeypatch):
+    job, calls = _poll(monkeypatch, [_conn_error(), "in_progress", _conn_error(), "completed"])
+    assert job.status == "completed"
+    assert calls == 4
+
+
+def test_poll_batch_gives_up_after_consecutive_errors(monkeypatch):
+    monkeypatch.setattr(bs, "BATCH_POLL_RETRIES", 3)
+    with pytest.raises(openai.APIConnectionError):
+        _poll(monkeypatch, [_conn_error()] * 3)
+
+
+def _run_resumed_batch(monkeypatch, error):
+    _make_task("t-batch", [(None, "pending")])
+    bs._set_batch_id_sync("t-batch", "batch_1")
+    monkeypatch.setattr(bs, "BATCH_POLL_INTERVAL", 0)
+    monkeypatch.setattr(bs, "BATCH_POLL_RETRIES", 1)
+    monkeypatch.setattr(bs, "_settings_cache", bs.Settings("http://x/v1", "k", "m"))
+    client = SimpleNamespace(batches=_FakeBatches([error]))
+
+    @asynccontextmanager
+    async def shared_client(base_url, api_key):
+        yield client
+
+    monkeypatch.setattr(bs, "_shared_client", shared_client)
+    asyncio.run(bs._translate_task_batch_api("t-batch"))
+    return bs._get_task_sync("t-batch"), bs._get_batch_id_sync("t-batch")
+
+
+def test_batch_job_forgets_batch_on_permanent_error(monkeypatch):
+    request = httpx.Request("GET", "http://x/v1/batches/batch_1")
+    error = openai.NotFoundError(
+        "no such batch", response=httpx.Response(404, request=request), body=None
+    )
+    task, batch_id = _run_resumed_batch(monkeypatch, error)
+    assert task["status"] == "error"
+    assert batch_id is None
+
+
+def test_batch_job_keeps_batch_on_transient_error(monkeypatch):
+    task, batch_id = _run_resumed_batch(monkeypatch, _conn_error())
+    assert task["status"] == "error"
+    assert batch_id == "batch_1"
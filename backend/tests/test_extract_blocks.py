@@ -0,0 +1,59 @@
+from docx import Document
+
+import backend_server as bs
+
+
+def _save(doc, tmp_path, name="doc.docx"):
+    path = str(tmp_path / name)
+    doc.save(path)
+    return path
+
+
+def _assert_parity(path):
+    expected = bs.extract_blocks(path)
+    assert bs.extract_blocks_stream(path) == expected
+    return expected
+
+
+def test_paragraphs_and_line_breaks(tmp_path):
+    doc = Document()
+    doc.add_paragraph("first\twith tab")
+    doc.add_paragraph("")
+    p = doc.add_paragraph("line")
+    p.add_run().add_break()
+    p.add_run("two")
+    doc.add_paragraph("   ")
+    doc.add_paragraph("last")
+
+    blocks = _assert_parity(_save(doc, tmp_path))
+    assert [b["locator"] for b in blocks] == ["p:0", "p:2", "p:4"]
+    assert blocks[1]["source_text"] == "line\ntwo"
+
+
+def test_merged_and_nested_tables(tmp_path):
+    doc = Document()
+    doc.add_paragraph("intro")
+    t = doc.add_table(rows=3, cols=3)
+    for r in range(3):
+        for c in range(3):
+            t.cell(r, c).text = f"c{r}{c}"
+    t.cell(0, 0).merge(t.cell(1, 0))  # vertical merge
+    t.cell(2, 1).merge(t.cell(2, 2))  # horizontal merge
+    t.cell(1, 1).add_paragraph("second paragraph")
+    inner = t.cell(1, 2).add_table(rows=1, cols=2)
+    inner.cell(0, 0).text = "nested"
+    doc.add_paragraph("between")
+    doc.add_table(rows=1, cols=1).cell(0, 0).text = "t2"
+    doc.add_paragraph("end")
+
+    blocks = _assert_parity(_save(doc, tmp_path))
+    locators = [b["locator"] for b in blocks]
+    # body paragraphs first, then tables, order_no contiguous
+    assert locators[:3] == ["p:0", "p:1", "p:2"]
+    assert "t:1/r:0/c:0/p:0" in locators
+    assert [b["order_no"] for b in blocks] == list(range(len(blocks)))
+    assert "nested" not in [b["source_text"] for b in blocks]
+
+
+def test_empty_document(tmp_path):
+    assert _assert_parity(_save(Document(), tmp_path)) == []
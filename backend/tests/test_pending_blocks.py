@@ -0,0 +1,39 @@
+import backend_server as bs
+
+
+def _make_task(task_id, statuses):
+    bs.init_db()
+    conn = bs.db()
+    blocks = [{"locator": f"p:{i}", "kind": "p", "source_text": f"s{i}"} for i in range(len(statuses))]
+    with conn:
+        conn.execute("DELETE FROM tasks WHERE id=?", (task_id,))
+        conn.execute("DELETE FROM blocks WHERE task_id=?", (task_id,))
+        conn.execute(
+            "INSERT INTO tasks(id, filename, source_path, work_path, direction, status, progress, sources) "
+            "VALUES(?,?,?,?,?,?,?,?)",
+            (task_id, "a.docx", "", "", "en->zh", "ready", 0.0, bs.pack_sources(blocks)),
+        )
+        conn.executemany(
+            "INSERT INTO blocks(id, task_id, order_no, translated_text, status) VALUES(?,?,?,?,?)",
+            [(f"{task_id}-{i}", task_id, i, text, status) for i, (text, status) in enumerate(statuses)],
+        )
+
+
+def test_begin_translate_selects_pending_blocks():
+    _make_task(
+        "t-pending",
+        [(None, "pending"), ("done", "translated"), ("", "translated"), ("mine", "edited"), ("x", "error")],
+    )
+    task, total, pending = bs._begin_translate_sync("t-pending")
+    assert total == 5
+    assert pending == [("t-pending-0", "s0"), ("t-pending-2", "s2"), ("t-pending-4", "s4")]
+
+
+def test_pending_scan_uses_partial_index():
+    bs.init_db()
+    plan = bs.db().execute(
+        f"EXPLAIN QUERY PLAN SELECT id, order_no FROM blocks WHERE task_id=? AND {bs._PENDING_WHERE} "
+        "ORDER BY order_no ASC",
+        ("t",),
+    ).fetchall()
+    assert "idx_blocks_pending" in " ".join(row[3] for row in plan)
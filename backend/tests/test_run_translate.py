@@ -0,0 +1,73 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import httpx
+
+import backend_server as bs
+from test_pending_blocks import _make_task
+
+
+def test_concurrent_run_translate_starts_one_job(monkeypatch):
+    _make_task("t-race", [(None, "pending")])
+    started = []
+
+    async def fake_job(task_id):
+        started.append(task_id)
+        await asyncio.sleep(0.05)
+
+    monkeypatch.setattr(bs, "_translate_task_async", fake_job)
+
+    async def go():
+        transport = httpx.ASGITransport(app=bs.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            rs = await asyncio.gather(
+                *(c.post("/api/tasks/t-race/run_translate") for _ in range(2))
+            )
+            await asyncio.gather(*bs._running.values())
+        return [r.json() for r in rs]
+
+    replies = asyncio.run(go())
+    assert started == ["t-race"]
+    assert sorted(r.get("status", "") for r in replies) == ["", "running"]
+
+
+class _FlakyCompletions:
+    async def create(self, model, messages, temperature):
+        text = messages[-1]["content"].split("\n\n", 1)[1]
+        if text == "s2":
+            await asyncio.sleep(0.02)
+            raise ValueError("boom")
+        message = SimpleNamespace(content=f"T({text})")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_failed_job_keeps_translations_waiting_to_be_written(monkeypatch):
+    _make_task("t-flaky", [(None, "pending")] * 3)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=_FlakyCompletions()))
+
+    @asynccontextmanager
+    async def shared_client(base_url, api_key):
+        yield client
+
+    save = bs._save_translations_sync
+
+    def slow_save(task_id, rows, progress):
+        # hold the write lock long enough for the other worker to queue behind it
+        time.sleep(0.1)
+        save(task_id, rows, progress)
+
+    monkeypatch.setattr(bs, "_shared_client", shared_client)
+    monkeypatch.setattr(bs, "_save_translations_sync", slow_save)
+    monkeypatch.setattr(bs, "_settings_cache", bs.Settings("http://x/v1", "k", "m"))
+    monkeypatch.setattr(bs, "BATCH_SIZE", 1)
+    monkeypatch.setattr(bs, "FLUSH_EVERY", 1)
+    asyncio.run(bs._translate_task_async("t-flaky"))
+
+    assert bs._get_task_sync("t-flaky")["status"] == "error"
+    rows = bs.db().execute(
+        "SELECT order_no, translated_text FROM blocks WHERE task_id=? ORDER BY order_no",
+        ("t-flaky",),
+    ).fetchall()
+    assert [tuple(r) for r in rows] == [(0, "T(s0)"), (1, "T(s1)"), (2, None)]